@@ -1,27 +1,29 @@
 from fastapi import FastAPI, HTTPException, Depends, Query
-from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from typing import List, Optional
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import update, Column, Index, Integer, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
-# Создание базы данных и модели
-DATABASE_URL = "sqlite:///./cars.db"
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+from cache import TTLCache
+from crud import crud_router
+from db import Base, get_db, table_lifespan
 
+# Модель базы данных
 class Car(Base):
     __tablename__ = "cars"
     id = Column(Integer, primary_key=True, index=True)
     make = Column(String, index=True)
     model = Column(String)
-    year = Column(Integer)
+    year = Column(Integer, index=True)
     color = Column(String)
     views = Column(Integer, default=0)  # Новая колонка для отслеживания просмотров(фича)
 
-Base.metadata.create_all(bind=engine)
+# Составной индекс под фильтр + сортировку в списке
+Index("ix_cars_make_year", Car.make, Car.year)
+# Индексы без учета регистра для поиска по префиксу (LIKE 'x%')
+Index("ix_cars_make_nocase", Car.make.collate("NOCASE"))
+Index("ix_cars_model_nocase", Car.model.collate("NOCASE"))
 
 # Модели Pydantic для валидации
 class CarCreate(BaseModel):
@@ -44,90 +46,55 @@ class CarResponse(BaseModel):
     color: str
     views: int  # Добавляем поле для просмотров
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
-app = FastAPI()
+app = FastAPI(
+    default_response_class=ORJSONResponse,
+    lifespan=table_lifespan(Car, "./cars.db", ("make", "model")),
+)
 
-# Зависимость для получения сессии базы данных
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Кэш страниц списка; сбрасывается при изменении данных, кроме счетчика просмотров:
+# read_car его не сбрасывает, поэтому views в списке (и ETag/304) могут отставать не дольше expire
+list_cache = TTLCache(maxsize=1024, expire=30)
 
-@app.get("/cars/", response_model=List[CarResponse])
-def read_cars(
-    skip: int = 0,
-    limit: int = 10,
-    sort_by: Optional[str] = Query(None, description="Сортировка по полю (например, make, year)"),
-    sort_order: Optional[str] = Query("asc", description="Порядок сортировки (asc/desc)"),
+# Фильтры списка
+def car_filters(
     filter_make: Optional[str] = Query(None, description="Фильтр по марке"),
     filter_year: Optional[int] = Query(None, description="Фильтр по году"),
-    search: Optional[str] = Query(None, description="Поиск по марке или модели"),
-    db: Session = Depends(get_db)
 ):
-    query = db.query(Car)
-
-    # Применение фильтров
+    where = []
     if filter_make:
-        query = query.filter(Car.make == filter_make)
+        where.append(Car.make == filter_make)
     if filter_year:
-        query = query.filter(Car.year == filter_year)
-    if search:
-        query = query.filter((Car.make.contains(search)) | (Car.model.contains(search)))
-
-    # Применение сортировки
-    if sort_by:
-        column = getattr(Car, sort_by, None)
-        if column is not None:
-            if sort_order.lower() == "desc":
-                query = query.order_by(column.desc())
-            else:
-                query = query.order_by(column.asc())
-
-    # Пагинация
-    cars = query.offset(skip).limit(limit).all()
-    return cars
-
-@app.get("/cars/{car_id}", response_model=CarResponse)
-def read_car(car_id: int, db: Session = Depends(get_db)):
-    car = db.query(Car).filter(Car.id == car_id).first()
+        where.append(Car.year == filter_year)
+    return where
+
+# Чтение одной машины свое: оно увеличивает счетчик просмотров
+router = crud_router(
+    Car,
+    CarCreate,
+    CarUpdate,
+    CarResponse,
+    get_db=get_db,
+    list_cache=list_cache,
+    filters=car_filters,
+    search_columns=(Car.make, Car.model),
+    search_description="Поиск по марке или модели",
+    not_found="Car not found",
+    defaults={"views": 0},  # Инициализация с нулевым количеством просмотров
+    read_one=False,
+)
+
+@router.get("/{car_id}", response_model=CarResponse)
+async def read_car(car_id: int, db: AsyncSession = Depends(get_db)):
+    # Увеличиваем счетчик просмотров атомарно, одним UPDATE ... RETURNING
+    car = (await db.execute(
+        update(Car).where(Car.id == car_id).values(views=Car.views + 1).returning(Car)
+    )).scalar_one_or_none()
     if car is None:
         raise HTTPException(status_code=404, detail="Car not found")
-    
-    # Увеличиваем счетчик просмотров
-    car.views += 1
-    db.commit()
-    db.refresh(car)
+    # Кэш списка здесь не сбрасываем: просмотры в списке отстают не дольше expire
+    await db.commit()
     return car
 
-@app.post("/cars/", response_model=CarResponse)
-def create_car(car: CarCreate, db: Session = Depends(get_db)):
-    db_car = Car(**car.dict(), views=0)  # Инициализация с нулевым количеством просмотров
-    db.add(db_car)
-    db.commit()
-    db.refresh(db_car)
-    return db_car
-
-@app.put("/cars/{car_id}", response_model=CarResponse)
-def update_car(car_id: int, car: CarUpdate, db: Session = Depends(get_db)):
-    db_car = db.query(Car).filter(Car.id == car_id).first()
-    if db_car is None:
-        raise HTTPException(status_code=404, detail="Car not found")
-    
-    for key, value in car.dict(exclude_unset=True).items():
-        setattr(db_car, key, value)
-    db.commit()
-    db.refresh(db_car)
-    return db_car
-
-@app.delete("/cars/{car_id}", status_code=204)
-def delete_car(car_id: int, db: Session = Depends(get_db)):
-    db_car = db.query(Car).filter(Car.id == car_id).first()
-    if db_car is None:
-        raise HTTPException(status_code=404, detail="Car not found")
-    db.delete(db_car)
-    db.commit()
-    return None
\ No newline at end of file
+app.include_router(router, prefix="/cars")
\ No newline at end of file
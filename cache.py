@@ -0,0 +1,37 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Кэш ответов в памяти процесса: LRU с ограниченным временем жизни записей.
+# У каждого воркера свой кэш, поэтому устаревание между процессами ограничено expire.
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, expire: float = 30):
+        self.maxsize = maxsize
+        self.expire = expire
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        # Номер поколения растет при каждом clear(); по нему отбрасываются
+        # значения, посчитанные до изменения данных
+        self.generation = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.expire, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.generation += 1
@@ -0,0 +1,205 @@
+import base64
+import hashlib
+import json
+import operator
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Type
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import and_, asc, delete, desc, insert, or_, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import configure_mappers
+
+from cache import TTLCache
+
+SORT_DIRECTIONS = {"asc": asc, "desc": desc}
+
+def fts_query(search: str) -> str:
+    # Каждое слово ищется как префикс токена; кавычки экранируются для синтаксиса FTS5
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in search.split())
+
+def like_prefix(search: str) -> str:
+    # Шаблон без ведущего % с экранированными спецсимволами: SQLite ищет его по индексу с COLLATE NOCASE
+    return search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+# Курсор keyset-пагинации: JSON [значение sort_by, id] в base64.
+# В заголовок попадает только ASCII, а NULL и тип значения сохраняются без потерь.
+def encode_cursor(value: Any, item_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, item_id]).encode()).decode("ascii")
+
+def decode_cursor(cursor: str):
+    try:
+        value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(item_id, int) or not (value is None or isinstance(value, (int, float, str))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, item_id
+
+# Фабрика CRUD-роутера: список с фильтрами/сортировкой/пагинацией, чтение, создание (в т.ч. пакетное), изменение, удаление.
+# filters — зависимость FastAPI, возвращающая список условий WHERE для списка.
+def crud_router(
+    model,
+    create_schema: Type[BaseModel],
+    update_schema: Type[BaseModel],
+    response_schema: Type[BaseModel],
+    *,
+    get_db: Callable,
+    list_cache: TTLCache,
+    filters: Callable[..., List[Any]],
+    search_columns: Sequence[Any],
+    search_description: str,
+    not_found: str,
+    defaults: Optional[Dict[str, Any]] = None,
+    read_one: bool = True,
+) -> APIRouter:
+    configure_mappers()
+    router = APIRouter()
+    table = model.__table__.name
+    defaults = defaults or {}
+
+    # Допустимые поля сортировки и заранее построенный запрос поиска
+    sort_columns = {column.key: getattr(model, column.key) for column in model.__table__.columns}
+    fts_search = text(f"SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :q")
+    # Сериализатор страницы списка строится один раз, а не на каждый запрос
+    list_adapter = TypeAdapter(List[response_schema])
+
+    @router.get("/", response_model=List[response_schema])
+    async def read_items(
+        request: Request,
+        skip: int = 0,
+        limit: int = 10,
+        sort_by: Optional[str] = Query(None, description=f"Сортировка по полю ({', '.join(sort_columns)})"),
+        sort_order: Literal["asc", "desc"] = Query("asc", description="Порядок сортировки (asc/desc)"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+        search: Optional[str] = Query(None, description=search_description),
+        search_mode: Literal["prefix", "contains"] = Query(
+            "prefix",
+            description="prefix — начало значения (индекс, для автодополнения); contains — слова в любом месте (FTS5)",
+        ),
+        where: List[Any] = Depends(filters),
+        db: AsyncSession = Depends(get_db)
+    ):
+        # Ключ кэша — только параметры запроса, без сессии БД.
+        # В кэше лежит готовое тело ответа, его ETag и заголовки курсора.
+        key = tuple(sorted(request.query_params.multi_items()))
+        page = list_cache.get(key)
+        if page is None:
+            # Поколение кэша до запроса: если во время await данные изменятся, страницу не кэшируем
+            generation = list_cache.generation
+            # Выбираем строки таблицы напрямую, без ORM-объектов и identity map
+            query = select(model.__table__).where(*where)
+            if search and search.strip():
+                if search_mode == "prefix":
+                    pattern = like_prefix(search)
+                    query = query.where(or_(*(column.like(pattern, escape="\\") for column in search_columns)))
+                else:
+                    query = query.where(model.id.in_(fts_search.bindparams(q=fts_query(search))))
+
+            # Применение сортировки; id добавляется для однозначного порядка страниц
+            column = model.id
+            if sort_by:
+                column = sort_columns.get(sort_by)
+                if column is None:
+                    raise HTTPException(status_code=400, detail=f"Unknown sort field: {sort_by}")
+            direction = SORT_DIRECTIONS[sort_order]
+            query = query.order_by(direction(column))
+            if column is not model.id:
+                query = query.order_by(direction(model.id))
+
+            # Пагинация: keyset по (sort_by, id), если передан курсор, иначе OFFSET.
+            # SQLite ставит NULL первыми при asc и последними при desc — курсор учитывает это явно.
+            if cursor is not None:
+                value, after_id = decode_cursor(cursor)
+                after = operator.lt if direction is desc else operator.gt
+                if column is model.id:
+                    seek = after(model.id, after_id)
+                elif value is None:
+                    seek = and_(column.is_(None), after(model.id, after_id))
+                    if direction is asc:
+                        seek = or_(seek, column.is_not(None))
+                else:
+                    seek = after(tuple_(column, model.id), tuple_(value, after_id))
+                    if direction is desc:
+                        seek = or_(seek, column.is_(None))
+                query = query.where(seek)
+            else:
+                query = query.offset(skip)
+
+            result = await db.execute(query.limit(limit))
+            # Данные из БД уже корректны, повторная валидация Pydantic не нужна
+            items = [response_schema.model_construct(**row._mapping) for row in result]
+
+            # Курсор следующей страницы
+            headers = {}
+            if items and len(items) == limit:
+                last = items[-1]
+                headers["X-Next-Cursor"] = encode_cursor(getattr(last, column.key), last.id)
+
+            body = list_adapter.dump_json(items)
+            headers["ETag"] = '"' + hashlib.md5(body).hexdigest() + '"'
+            page = (body, headers)
+            list_cache.set(key, page, generation)
+
+        body, headers = page
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    if read_one:
+        @router.get("/{item_id}", response_model=response_schema)
+        async def read_item(item_id: int, db: AsyncSession = Depends(get_db)):
+            item = await db.get(model, item_id)
+            if item is None:
+                raise HTTPException(status_code=404, detail=not_found)
+            return item
+
+    @router.post("/", response_model=response_schema)
+    async def create_item(item: create_schema, db: AsyncSession = Depends(get_db)):
+        # Все поля известны заранее (defaults задаются явно), id заполняется при flush —
+        # повторный SELECT через refresh не нужен
+        db_item = model(**item.model_dump(), **defaults)
+        db.add(db_item)
+        await db.commit()
+        list_cache.clear()
+        return db_item
+
+    @router.post("/bulk", response_model=List[response_schema])
+    async def create_items(items: List[create_schema], db: AsyncSession = Depends(get_db)):
+        if not items:
+            return []
+        # Все строки вставляются одним executemany в одной транзакции
+        db_items = (await db.scalars(
+            insert(model).returning(model, sort_by_parameter_order=True),
+            [{**item.model_dump(), **defaults} for item in items],
+        )).all()
+        await db.commit()
+        list_cache.clear()
+        return db_items
+
+    @router.put("/{item_id}", response_model=response_schema)
+    async def update_item(item_id: int, item: update_schema, db: AsyncSession = Depends(get_db)):
+        # Проверка существования и изменение одним UPDATE ... RETURNING
+        values = item.model_dump(exclude_unset=True)
+        if values:
+            db_item = (await db.execute(
+                update(model).where(model.id == item_id).values(**values).returning(model)
+            )).scalar_one_or_none()
+        else:
+            db_item = await db.get(model, item_id)
+        if db_item is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        await db.commit()
+        list_cache.clear()
+        return db_item
+
+    @router.delete("/{item_id}", status_code=204)
+    async def delete_item(item_id: int, db: AsyncSession = Depends(get_db)):
+        deleted_id = await db.scalar(delete(model).where(model.id == item_id).returning(model.id))
+        if deleted_id is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        await db.commit()
+        list_cache.clear()
+        return None
+
+    return router
@@ -0,0 +1,128 @@
+import os
+import sqlite3
+from asyncio import current_task
+from contextlib import asynccontextmanager, closing
+from typing import Sequence
+
+from sqlalchemy import event, select, text, Column, String, Table
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_scoped_session, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Одна база данных на все приложения: общий кэш страниц, WAL и пул соединений
+DATABASE_URL = "sqlite+aiosqlite:///./app.db"
+
+engine = create_async_engine(
+    DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    query_cache_size=1200,
+    connect_args={"check_same_thread": False},
+)
+
+# Настройка SQLite один раз для каждого нового соединения
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragma(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+# Одна сессия на задачу запроса из общего реестра
+SessionScope = async_scoped_session(SessionLocal, scopefunc=current_task)
+Base = declarative_base()
+
+# Зависимость для получения сессии базы данных
+async def get_db():
+    db = SessionScope()
+    try:
+        yield db
+    finally:
+        await SessionScope.remove()
+
+# Таблицы, для которых перенос из старого файла БД уже выполнен
+legacy_imports = Table("legacy_imports", Base.metadata, Column("table_name", String, primary_key=True))
+
+# Однократный перенос строк из старого отдельного файла БД (energy_drinks.db, cars.db, sneakers.db).
+# Факт переноса записывается в legacy_imports, поэтому удаленные позже строки не вернутся при перезапуске.
+def import_legacy_table(conn, table, path: str):
+    legacy_imports.create(bind=conn, checkfirst=True)
+    done = conn.execute(
+        select(legacy_imports.c.table_name).where(legacy_imports.c.table_name == table.name)
+    ).first()
+    if done is not None:
+        return
+    conn.execute(legacy_imports.insert().values(table_name=table.name))
+
+    # Непустая таблица без отметки — база, заполненная до появления legacy_imports: не переносим повторно
+    if not os.path.exists(path) or conn.execute(select(table).limit(1)).first() is not None:
+        return
+    columns = [column.name for column in table.columns]
+    with closing(sqlite3.connect(path)) as legacy:
+        exists = legacy.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).fetchone()
+        if exists is None:
+            return
+        rows = legacy.execute(f"SELECT {', '.join(columns)} FROM {table.name}").fetchall()
+    if rows:
+        conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+# Полнотекстовый индекс FTS5 для таблицы, синхронизируется триггерами
+def init_fts(conn, table: str, columns: Sequence[str]):
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+
+    fts_exists = conn.execute(text(f"SELECT 1 FROM sqlite_master WHERE name = '{table}_fts'")).first()
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts "
+        f"USING fts5({cols}, content='{table}', content_rowid='id')"
+    ))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {table}_fts(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {table}_fts({table}_fts, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {table}_fts({table}_fts, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {table}_fts(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+    """))
+    if fts_exists is None:
+        # Индексируем строки, которые уже были в таблице
+        conn.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+
+# Создание таблицы модели, ее индексов, перенос старых данных и FTS
+def init_table(conn, model, legacy_path: str, fts_columns: Sequence[str]):
+    table = model.__table__
+    Base.metadata.create_all(bind=conn, tables=[table])
+    # create_all не добавляет новые индексы в уже существующую таблицу
+    for index in table.indexes:
+        index.create(bind=conn, checkfirst=True)
+    import_legacy_table(conn, table, legacy_path)
+    init_fts(conn, table.name, fts_columns)
+
+# lifespan приложения: схема создается один раз при запуске, пул закрывается при остановке
+def table_lifespan(model, legacy_path: str, fts_columns: Sequence[str]):
+    @asynccontextmanager
+    async def lifespan(app):
+        async with engine.begin() as conn:
+            await conn.run_sync(init_table, model, legacy_path, fts_columns)
+        yield
+        await engine.dispose()
+    return lifespan
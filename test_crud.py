@@ -0,0 +1,18 @@
+import pytest
+from fastapi import HTTPException
+
+from crud import decode_cursor, encode_cursor
+
+def test_cursor_round_trips_cyrillic_value():
+    cursor = encode_cursor("Адреналин", 5)
+    # Заголовки кодируются в latin-1, курсор должен быть чистым ASCII
+    cursor.encode("latin-1")
+    assert decode_cursor(cursor) == ("Адреналин", 5)
+
+def test_cursor_keeps_null_value():
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("Адреналин")
+    assert exc.value.status_code == 400